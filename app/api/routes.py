@@ -2,10 +2,13 @@
 
 import logging
 import uuid
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import numpy as np
+import orjson
 from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import ORJSONResponse
+from redis import asyncio as aioredis
 
 from app.api.schemas import (
     EnergyRequest,
@@ -18,38 +21,87 @@ from app.api.schemas import (
     OptimizeResponse,
     SMILESOptimizeRequest,
 )
+from app.config import settings
 from app.core.model_manager import model_manager
 from app.core.optimizer import optimizer
-from app.tasks import celery_app, optimize_structure_task
+from app.tasks import (
+    celery_app,
+    optimize_coords_task,
+    record_job_failure_task,
+    smiles_to_coords_task,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Async client for the Celery result backend, created on first use
+_result_redis: Optional[aioredis.Redis] = None
+
+
+async def _get_result_redis() -> aioredis.Redis:
+    """Get (lazily creating) the async client for the Celery result backend."""
+    global _result_redis
+    if _result_redis is None:
+        _result_redis = await aioredis.from_url(
+            settings.celery_result_backend,
+            decode_responses=False,
+        )
+    return _result_redis
+
+
+def _validate_structure(coordinates: np.ndarray, elements: np.ndarray):
+    """Validate structure arrays in one shape/dtype check.
+
+    Ensures coordinates form a contiguous (N, 3) float array matching the
+    element count, so downstream code can rely on that layout for
+    zero-copy tensor wraps.
+    """
+    if coordinates.ndim != 2 or coordinates.shape[1] != 3:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "detail": "Coordinates must be an (N, 3) array",
+                "error_code": "INVALID_COORDINATES",
+            },
+        )
+    if coordinates.dtype not in (np.float32, np.float64):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "detail": "Coordinates must be float32 or float64",
+                "error_code": "INVALID_COORDINATES",
+            },
+        )
+    if coordinates.shape[0] != elements.size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={
+                "detail": "Number of coordinates must match number of elements",
+                "error_code": "SHAPE_MISMATCH",
+            },
+        )
+
 
 @router.post(
     "/optimize",
     response_model=OptimizeResponse,
     responses={400: {"model": ErrorResponse}},
 )
-async def optimize_structure(request: OptimizeRequest) -> OptimizeResponse:
+async def optimize_structure(request: OptimizeRequest) -> ORJSONResponse:
     """
     Optimize molecular structure using TorchANI.
-    
+
     This endpoint performs synchronous optimization. For large molecules
     or batch processing, use the async job submission endpoint.
     """
     try:
-        # Convert to numpy arrays
-        coordinates = np.array(request.coordinates)
-        elements = request.elements
-        
+        # Coordinates arrive as a float32 array from schema validation
+        coordinates = request.coordinates
+        elements = np.asarray(request.elements, dtype=np.int64)
+
         # Validate input
-        if coordinates.shape[0] != len(elements):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Number of coordinates must match number of elements",
-            )
+        _validate_structure(coordinates, elements)
         
         # Run optimization
         result = await optimizer.optimize_structure(
@@ -62,8 +114,15 @@ async def optimize_structure(request: OptimizeRequest) -> OptimizeResponse:
             optimizer=request.optimizer,
         )
         
-        return OptimizeResponse(**result)
-        
+        # Serialize the result arrays straight through orjson
+        # (OPT_SERIALIZE_NUMPY) instead of boxing them into the
+        # response model float by float
+        return ORJSONResponse(result)
+
+    except HTTPException:
+        # Validation errors carry structured 400 details; don't let the
+        # generic handler collapse them into a 500
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -82,7 +141,7 @@ async def optimize_structure(request: OptimizeRequest) -> OptimizeResponse:
     response_model=EnergyResponse,
     responses={400: {"model": ErrorResponse}},
 )
-async def calculate_energy(request: EnergyRequest) -> EnergyResponse:
+async def calculate_energy(request: EnergyRequest) -> ORJSONResponse:
     """
     Calculate single-point energy without optimization.
     
@@ -90,26 +149,33 @@ async def calculate_energy(request: EnergyRequest) -> EnergyResponse:
     without modifying the structure.
     """
     try:
-        # Convert to numpy arrays
-        coordinates = np.array(request.coordinates)
-        elements = request.elements
-        
+        # Coordinates arrive as a float32 array from schema validation
+        coordinates = request.coordinates
+        elements = np.asarray(request.elements, dtype=np.int64)
+
         # Validate input
-        if coordinates.shape[0] != len(elements):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Number of coordinates must match number of elements",
-            )
+        _validate_structure(coordinates, elements)
         
-        # Calculate energy
-        result = await optimizer.calculate_energy(
+        # Auto-select model if not specified
+        model_name = request.model_name
+        if model_name is None:
+            element_set = set(elements.tolist())
+            model_name = model_manager.select_best_model(element_set)
+            if model_name is None:
+                raise ValueError(f"No model supports elements: {element_set}")
+
+        # Submit to the micro-batcher so concurrent requests share one forward
+        result = await model_manager.batcher.submit(
             coordinates=coordinates,
             elements=elements,
-            model_name=request.model_name,
+            model_name=model_name,
+            compute_forces=request.compute_forces,
         )
-        
-        return EnergyResponse(**result)
-        
+
+        return ORJSONResponse(result)
+
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -128,7 +194,7 @@ async def calculate_energy(request: EnergyRequest) -> EnergyResponse:
     response_model=OptimizeResponse,
     responses={400: {"model": ErrorResponse}},
 )
-async def optimize_from_smiles(request: SMILESOptimizeRequest) -> OptimizeResponse:
+async def optimize_from_smiles(request: SMILESOptimizeRequest) -> ORJSONResponse:
     """
     Optimize molecular structure from SMILES string.
     
@@ -136,9 +202,15 @@ async def optimize_from_smiles(request: SMILESOptimizeRequest) -> OptimizeRespon
     The initial 3D structure is generated using RDKit's MMFF force field.
     """
     try:
-        # Convert SMILES to structure
-        coordinates, elements = optimizer.smiles_to_structure(request.smiles)
-        
+        # Convert SMILES to structure through the conformer cache; misses
+        # run RDKit embedding in a worker thread off the event loop
+        coordinates, elements = await optimizer.smiles_to_structure_cached(
+            request.smiles
+        )
+        coordinates = np.ascontiguousarray(coordinates, dtype=np.float32)
+        elements = np.asarray(elements, dtype=np.int64)
+        _validate_structure(coordinates, elements)
+
         # Run optimization
         result = await optimizer.optimize_structure(
             coordinates=coordinates,
@@ -149,8 +221,10 @@ async def optimize_from_smiles(request: SMILESOptimizeRequest) -> OptimizeRespon
             optimizer=request.optimizer,
         )
         
-        return OptimizeResponse(**result)
-        
+        return ORJSONResponse(result)
+
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -256,17 +330,23 @@ async def submit_job(request: SMILESOptimizeRequest) -> JobSubmitResponse:
     try:
         # Generate job ID
         job_id = str(uuid.uuid4())
-        
-        # Submit to Celery
-        task = optimize_structure_task.delay(
+
+        # Chain CPU-side conversion into the GPU-side optimization so GPU
+        # workers stay GPU-bound; the final task carries the job ID
+        task_chain = smiles_to_coords_task.s(request.smiles) | optimize_coords_task.s(
             job_id=job_id,
-            smiles=request.smiles,
             model_name=request.model_name,
             max_steps=request.max_steps,
             fmax=request.fmax,
-            optimizer=request.optimizer,
+            optimizer_name=request.optimizer,
+        ).set(task_id=job_id)
+        # If any link of the chain fails before the final task runs, the
+        # errback records a FAILURE result under the job id so status
+        # polling doesn't report the job as pending forever
+        task_chain.apply_async(
+            link_error=record_job_failure_task.s(job_id=job_id)
         )
-        
+
         return JobSubmitResponse(
             job_id=job_id,
             status="submitted",
@@ -292,21 +372,32 @@ async def get_job_status(job_id: str) -> JobStatusResponse:
     Returns the current status, progress, and results if completed.
     """
     try:
-        # Get task result from Celery
-        result = celery_app.AsyncResult(job_id)
-        
         # Map Celery states to our status
         status_map = {
             "PENDING": "pending",
             "STARTED": "processing",
+            "PROGRESS": "processing",
             "SUCCESS": "completed",
             "FAILURE": "failed",
             "RETRY": "retrying",
             "REVOKED": "cancelled",
         }
-        
-        job_status = status_map.get(result.state, "unknown")
-        
+
+        # Read the result-backend key in one async round-trip instead of
+        # going through the sync AsyncResult API inside the event loop
+        redis_client = await _get_result_redis()
+        raw_meta = await redis_client.get(f"celery-task-meta-{job_id}")
+
+        if raw_meta is not None:
+            meta = orjson.loads(raw_meta)
+            job_status = status_map.get(meta.get("status"), "unknown")
+            task_result = meta.get("result")
+        else:
+            # Key missing (e.g. job never started): fall back to Celery
+            result = celery_app.AsyncResult(job_id)
+            job_status = status_map.get(result.state, "unknown")
+            task_result = result.info
+
         response = JobStatusResponse(
             job_id=job_id,
             status=job_status,
@@ -316,18 +407,18 @@ async def get_job_status(job_id: str) -> JobStatusResponse:
             created_at="",
             completed_at=None,
         )
-        
+
         # Add result or error based on status
         if job_status == "completed":
-            response.result = result.result
+            response.result = task_result
             response.progress = 100.0
         elif job_status == "failed":
-            response.error = str(result.info)
+            response.error = str(task_result)
         elif job_status == "processing":
             # Get progress from result metadata if available
-            if hasattr(result, "info") and isinstance(result.info, dict):
-                response.progress = result.info.get("progress", 50.0)
-        
+            if isinstance(task_result, dict):
+                response.progress = task_result.get("progress", 50.0)
+
         return response
         
     except Exception as e:
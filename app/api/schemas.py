@@ -1,17 +1,22 @@
 """Pydantic schemas for API requests and responses."""
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Optional
 
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 class OptimizeRequest(BaseModel):
     """Request schema for structure optimization."""
-    
-    coordinates: List[List[float]] = Field(
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    # Typed Any so Pydantic doesn't box every float into nested lists
+    # before the array conversion; the validator below is the real check
+    coordinates: Any = Field(
         ..., description="Atomic coordinates (N x 3 array)"
     )
-    elements: List[int] = Field(
+    elements: list[int] = Field(
         ..., description="Atomic numbers for each atom"
     )
     model_name: Optional[str] = Field(
@@ -21,9 +26,21 @@ class OptimizeRequest(BaseModel):
     max_steps: int = Field(1000, description="Maximum optimization steps")
     fmax: float = Field(1e-6, description="Force convergence criterion")
     optimizer: str = Field(
-        "LBFGS", description="Optimization algorithm (LBFGS, BFGS, FIRE)"
+        "LBFGS", description="Optimization algorithm (LBFGS, ASE-LBFGS, BFGS, FIRE)"
     )
 
+    @field_validator("coordinates", mode="before")
+    @classmethod
+    def _coordinates_to_array(cls, v: Any) -> np.ndarray:
+        """Convert raw coordinates straight to a float32 (N, 3) array."""
+        try:
+            arr = np.asarray(v, dtype=np.float32)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"coordinates must be numeric: {e}") from e
+        if arr.ndim != 2 or arr.shape[1] != 3:
+            raise ValueError("coordinates must be an (N, 3) array")
+        return arr
+
 
 class OptimizeResponse(BaseModel):
     """Response schema for structure optimization."""
@@ -31,36 +48,57 @@ class OptimizeResponse(BaseModel):
     success: bool = Field(..., description="Whether optimization converged")
     model_used: str = Field(..., description="TorchANI model used")
     energy: float = Field(..., description="Final energy in Hartree")
-    coordinates: List[List[float]] = Field(
+    coordinates: list[list[float]] = Field(
         ..., description="Optimized coordinates"
     )
-    forces: List[List[float]] = Field(..., description="Final forces")
+    forces: list[list[float]] = Field(..., description="Final forces")
     steps_taken: int = Field(..., description="Number of optimization steps")
     charge: int = Field(..., description="Molecular charge")
-    elements: List[int] = Field(..., description="Atomic numbers")
+    elements: list[int] = Field(..., description="Atomic numbers")
 
 
 class EnergyRequest(BaseModel):
     """Request schema for single-point energy calculation."""
-    
-    coordinates: List[List[float]] = Field(
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    # Typed Any so Pydantic doesn't box every float into nested lists
+    # before the array conversion; the validator below is the real check
+    coordinates: Any = Field(
         ..., description="Atomic coordinates (N x 3 array)"
     )
-    elements: List[int] = Field(
+    elements: list[int] = Field(
         ..., description="Atomic numbers for each atom"
     )
     model_name: Optional[str] = Field(
         None, description="TorchANI model to use (auto-select if not provided)"
     )
+    compute_forces: bool = Field(
+        True, description="Whether to compute forces (skipping them is faster)"
+    )
+
+    @field_validator("coordinates", mode="before")
+    @classmethod
+    def _coordinates_to_array(cls, v: Any) -> np.ndarray:
+        """Convert raw coordinates straight to a float32 (N, 3) array."""
+        try:
+            arr = np.asarray(v, dtype=np.float32)
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"coordinates must be numeric: {e}") from e
+        if arr.ndim != 2 or arr.shape[1] != 3:
+            raise ValueError("coordinates must be an (N, 3) array")
+        return arr
 
 
 class EnergyResponse(BaseModel):
     """Response schema for single-point energy calculation."""
-    
+
     model_used: str = Field(..., description="TorchANI model used")
     energy: float = Field(..., description="Energy in Hartree")
-    forces: List[List[float]] = Field(..., description="Forces on atoms")
-    elements: List[int] = Field(..., description="Atomic numbers")
+    forces: Optional[list[list[float]]] = Field(
+        None, description="Forces on atoms (omitted if not requested)"
+    )
+    elements: list[int] = Field(..., description="Atomic numbers")
 
 
 class SMILESOptimizeRequest(BaseModel):
@@ -83,7 +121,7 @@ class ModelInfo(BaseModel):
     available: bool = Field(..., description="Whether model is available")
     loaded: bool = Field(..., description="Whether model is in GPU memory")
     last_used: Optional[float] = Field(None, description="Last usage timestamp")
-    metadata: Optional[Dict[str, Any]] = Field(
+    metadata: Optional[dict[str, Any]] = Field(
         None, description="Additional metadata"
     )
 
@@ -91,10 +129,10 @@ class ModelInfo(BaseModel):
 class ModelsResponse(BaseModel):
     """Response schema for model listing."""
     
-    models: Dict[str, ModelInfo] = Field(
+    models: dict[str, ModelInfo] = Field(
         ..., description="Available models and their status"
     )
-    gpu_stats: Dict[str, Any] = Field(
+    gpu_stats: dict[str, Any] = Field(
         ..., description="GPU memory statistics"
     )
 
@@ -130,7 +168,7 @@ class JobStatusResponse(BaseModel):
     job_id: str = Field(..., description="Job identifier")
     status: str = Field(..., description="Current job status")
     progress: float = Field(..., description="Progress percentage (0-100)")
-    result: Optional[Dict[str, Any]] = Field(
+    result: Optional[dict[str, Any]] = Field(
         None, description="Job result if completed"
     )
     error: Optional[str] = Field(None, description="Error message if failed")
@@ -36,20 +36,33 @@ class Settings(BaseSettings):
     celery_result_backend: str = "redis://localhost:6379/2"
     celery_task_time_limit: int = 600  # 10 minutes
     celery_task_soft_time_limit: int = 540  # 9 minutes
+    celery_worker_prefetch_multiplier: int = 1
     
     # GPU settings
     gpu_device: str = "cuda:0"
     gpu_memory_limit: float = 0.8  # 80% of available memory
     gpu_memory_threshold: float = 0.7  # Trigger cleanup at 70%
+    # Float32 matmul precision: "high" routes through TF32 tensor cores on
+    # Ampere+; set MATMUL_PRECISION=highest to force full FP32 for benchmarks
+    matmul_precision: str = "high"
     
     # Model settings
+    model_dtype: str = "float32"  # float32, float64, bfloat16
+    # Post-training quantization: "bf16" (GPU) or "int8" (CPU-only dynamic
+    # quantization of Linear layers). ANI energies typically stay within
+    # chemical accuracy at bf16.
+    model_quantize: str = "none"  # none, bf16, int8
     model_max_loaded: int = 2
-    model_preload: list[str] = []
+    model_preload: list[str] = ["ANI2x"]
     model_cache_dir: str = "/tmp/torchani_models"
+    # Conformers embedded per SMILES; the lowest MMFF energy one is kept
+    num_conformers: int = 4
     
     # Performance settings
     max_batch_size: int = 32
     max_atoms: int = 500
+    max_batch_atoms: int = 256  # larger molecules fall back to per-molecule ASE
+    use_cuda_graphs: bool = True  # replay captured graphs in the optimize loop
     request_timeout: int = 60
     worker_threads: int = 4
     
@@ -0,0 +1,148 @@
+"""Micro-batching of concurrent single-point energy requests."""
+
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+import numpy as np
+import torch
+from ase.units import Hartree
+
+logger = logging.getLogger(__name__)
+
+
+class _PendingRequest:
+    """A single energy request waiting to be batched."""
+
+    def __init__(
+        self,
+        coordinates: np.ndarray,
+        elements: np.ndarray,
+        future: asyncio.Future,
+        compute_forces: bool = True,
+    ):
+        self.coordinates = coordinates
+        self.elements = elements
+        self.future = future
+        self.compute_forces = compute_forces
+
+
+class AsyncBatcher:
+    """Coalesces concurrent energy requests into one batched model forward.
+
+    Requests for the same model that arrive within ``max_wait_ms`` of each
+    other (up to ``max_batch``) are padded to a common atom count and run
+    through a single forward+backward pass; per-molecule energies and
+    forces are sliced back out onto each caller's future.
+    """
+
+    def __init__(self, manager: Any, max_wait_ms: float = 5.0, max_batch: int = 32):
+        self.manager = manager
+        self.max_wait_ms = max_wait_ms
+        self.max_batch = max_batch
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.consumers: Dict[str, asyncio.Task] = {}
+
+    async def submit(
+        self,
+        coordinates: np.ndarray,
+        elements: np.ndarray,
+        model_name: str,
+        compute_forces: bool = True,
+    ) -> Dict[str, Any]:
+        """Submit one molecule and wait for its batched result."""
+        future = asyncio.get_running_loop().create_future()
+
+        if model_name not in self.queues:
+            # Reject unknown names before creating per-model state: the
+            # queue and consumer task live for the process lifetime, so
+            # arbitrary user-supplied names would accumulate forever
+            if not self.manager.is_known_model(model_name):
+                raise ValueError(f"Unknown model: {model_name}")
+            self.queues[model_name] = asyncio.Queue()
+            self.consumers[model_name] = asyncio.create_task(self._consume(model_name))
+
+        await self.queues[model_name].put(
+            _PendingRequest(coordinates, elements, future, compute_forces)
+        )
+        return await future
+
+    async def close(self):
+        """Cancel consumer tasks."""
+        for task in self.consumers.values():
+            task.cancel()
+        self.consumers.clear()
+        self.queues.clear()
+
+    async def _consume(self, model_name: str):
+        """Collect requests for up to max_wait_ms, then run one batch."""
+        queue = self.queues[model_name]
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000.0
+
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                model = await self.manager.get_fused_forward(model_name)
+                results = await self._run_batch(model_name, batch, model)
+                for request, result in zip(batch, results):
+                    if not request.future.done():
+                        request.future.set_result(result)
+            except Exception as e:
+                logger.error(f"Batched energy evaluation failed for {model_name}: {e}")
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+
+    async def _run_batch(
+        self, model_name: str, batch: List[_PendingRequest], model: Any
+    ) -> List[Dict[str, Any]]:
+        """Pad the batch to a common size and run one forward+backward."""
+        dtype = self.manager.dtype
+        n_max = max(len(request.elements) for request in batch)
+
+        # Pad species with ANI's -1 sentinel, coordinates with zeros
+        species = torch.full((len(batch), n_max), -1, dtype=torch.long)
+        coords = torch.zeros((len(batch), n_max, 3), dtype=dtype)
+        for i, request in enumerate(batch):
+            n = len(request.elements)
+            species[i, :n] = torch.as_tensor(np.asarray(request.elements, dtype=np.int64))
+            coords[i, :n] = torch.as_tensor(request.coordinates, dtype=dtype)
+
+        species, coords = await self.manager.stage_to_device(species, coords)
+
+        # Skip autograd bookkeeping entirely when nobody wants forces
+        need_forces = any(request.compute_forces for request in batch)
+        if need_forces:
+            coords.requires_grad_(True)
+            with self.manager.autocast_context():
+                energies = model((species, coords)).energies
+            # Hartree/A -> eV/A, matching the non-batched energy path
+            forces = -torch.autograd.grad(energies.sum(), coords)[0] * Hartree
+            forces_np = forces.detach().cpu().numpy()
+        else:
+            with torch.inference_mode(), self.manager.autocast_context():
+                energies = model((species, coords)).energies
+            forces_np = None
+
+        results = []
+        for i, request in enumerate(batch):
+            n = len(request.elements)
+            results.append({
+                "model_used": model_name,
+                "energy": float(energies[i].item()) * Hartree,
+                "forces": forces_np[i, :n] if request.compute_forces else None,
+                "elements": np.asarray(request.elements).tolist(),
+            })
+
+        return results
@@ -1,49 +1,135 @@
 """GPU memory-aware model manager with Redis caching."""
 
 import asyncio
-import json
+import functools
 import logging
 import time
-from contextlib import asynccontextmanager
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from contextlib import asynccontextmanager, nullcontext
+from typing import Any, Dict, Optional, Set, Tuple
 
+import orjson
 import torch
 import torchani
 from redis import asyncio as aioredis
 
 from app.config import settings
+from app.core.batcher import AsyncBatcher
 
 logger = logging.getLogger(__name__)
 
+_MODEL_DTYPES = {
+    "float32": torch.float32,
+    "float64": torch.float64,
+    "bfloat16": torch.bfloat16,
+}
+
+_ANI_ELEMENTS = {
+    "ANI1ccx": frozenset({1, 6, 7, 8}),  # H, C, N, O
+    "ANI1x": frozenset({1, 6, 7, 8}),  # H, C, N, O
+    "ANI2x": frozenset({1, 6, 7, 8, 9, 16, 17}),  # H, C, N, O, F, S, Cl
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _select_best_model(elements: frozenset) -> Optional[str]:
+    """Pick the preferred model whose element set covers the molecule."""
+    for model_name in ("ANI2x", "ANI1ccx", "ANI1x"):
+        if elements <= _ANI_ELEMENTS[model_name]:
+            return model_name
+    return None
+
 
 class ModelManager:
     """Manages TorchANI models with GPU memory optimization and Redis caching."""
     
     def __init__(self):
         self.redis_client: Optional[aioredis.Redis] = None
-        self.models_in_memory: Dict[str, Any] = {}
+        # LRU order: oldest model first, most recently used last
+        self.models_in_memory: OrderedDict[str, Any] = OrderedDict()
         self.model_last_used: Dict[str, float] = {}
-        self.lock = asyncio.Lock()
+        # Byte accounting for eviction decisions (no CUDA calls needed)
+        self.model_bytes: Dict[str, int] = {}
+        self.bytes_used: int = 0
+        # CUDA graphs keyed by (model, padded species sequence); failed
+        # captures are remembered so callers fall back to the eager path
+        # without re-running the warmup passes on every request
+        self.graph_cache: Dict[Tuple[str, Tuple[int, ...]], Any] = {}
+        self._graph_capture_failed: Set[Tuple[str, Tuple[int, ...]]] = set()
+        self._fused_forward_cache: Dict[str, Any] = {}
+        self.batcher = AsyncBatcher(self, max_wait_ms=5.0, max_batch=settings.max_batch_size)
+        # Per-model locks serialize loads of the same model; the map lock
+        # guards structural changes to the loaded set
+        self._model_locks: Dict[str, asyncio.Lock] = {}
+        self._map_lock = asyncio.Lock()
         self.device = torch.device(settings.gpu_device if torch.cuda.is_available() else "cpu")
-        
+        self.dtype = _MODEL_DTYPES.get(settings.model_dtype, torch.float32)
+        # Pinned-memory staging pool for host-to-device uploads (CUDA only)
+        self.pinned_coords: Optional[torch.Tensor] = None
+        self.pinned_species: Optional[torch.Tensor] = None
+        self._pinned_slots: Optional[asyncio.Queue] = None
+        self._slot_events: list = []
+
     async def initialize(self):
         """Initialize Redis connection and preload models."""
+        # Configure TF32 tensor-core paths for float32 matmuls (Ampere+)
+        allow_tf32 = settings.matmul_precision != "highest"
+        torch.set_float32_matmul_precision(settings.matmul_precision)
+        torch.backends.cuda.matmul.allow_tf32 = allow_tf32
+        torch.backends.cudnn.allow_tf32 = allow_tf32
+
+        # Preallocate pinned staging buffers so coordinate uploads run as
+        # async DMA transfers instead of synchronous pageable copies
+        if torch.cuda.is_available():
+            self.pinned_coords = torch.empty(
+                (settings.worker_threads, settings.max_atoms, 3),
+                dtype=self.dtype,
+                pin_memory=True,
+            )
+            self.pinned_species = torch.full(
+                (settings.worker_threads, settings.max_atoms),
+                -1,
+                dtype=torch.long,
+                pin_memory=True,
+            )
+            self._pinned_slots = asyncio.Queue()
+            self._slot_events = []
+            for slot in range(settings.worker_threads):
+                self._pinned_slots.put_nowait(slot)
+                self._slot_events.append(torch.cuda.Event())
+
+        # redis-py auto-selects the hiredis reply parser when it is
+        # installed (default RESP2; forcing RESP3 would bypass it)
         self.redis_client = await aioredis.from_url(
             settings.redis_url,
             encoding="utf-8",
             decode_responses=True,
         )
         
-        # Preload specified models
+        # Let cuDNN autotune kernel choices for the shapes it sees
+        torch.backends.cudnn.benchmark = True
+
+        # Preload specified models and warm them up so the first request
+        # doesn't pay model load + kernel compilation inside a handler
         for model_name in settings.model_preload:
             try:
-                await self.get_model(model_name)
+                model = await self.get_model(model_name)
+                self._warmup_model(model)
                 logger.info(f"Preloaded model: {model_name}")
             except Exception as e:
                 logger.error(f"Failed to preload model {model_name}: {e}")
+
+    def _warmup_model(self, model: Any):
+        """Run a dummy forward so CUDA kernels and compile caches are primed."""
+        species = torch.tensor([[1, 6, 1]], device=self.device)
+        coords = torch.zeros((1, 3, 3), device=self.device, dtype=self.dtype)
+        with torch.no_grad():
+            model((species, coords))
     
     async def close(self):
         """Clean up resources."""
+        await self.batcher.close()
+
         if self.redis_client:
             await self.redis_client.close()
         
@@ -55,38 +141,34 @@ class ModelManager:
         """Get current GPU memory usage as a fraction."""
         if not torch.cuda.is_available():
             return 0.0
-        
-        torch.cuda.synchronize()
+
+        # memory_allocated is an allocator-side counter; no device sync needed
         allocated = torch.cuda.memory_allocated(self.device)
         total = torch.cuda.get_device_properties(self.device).total_memory
         return allocated / total
     
-    async def _check_memory_pressure(self) -> bool:
-        """Check if GPU memory is under pressure."""
-        usage = self._get_gpu_memory_usage()
-        return usage > settings.gpu_memory_threshold
-    
+    def _get_memory_budget(self) -> float:
+        """Model-memory budget in bytes from the configured GPU fraction."""
+        if self.device.type != "cuda":
+            return float("inf")
+
+        total = torch.cuda.get_device_properties(self.device).total_memory
+        return settings.gpu_memory_limit * total
+
+
     async def _evict_oldest_model(self):
         """Evict the least recently used model."""
         if not self.models_in_memory:
             return
         
-        oldest_model = min(self.model_last_used, key=self.model_last_used.get)
+        oldest_model = next(iter(self.models_in_memory))
         logger.info(f"Evicting model {oldest_model} due to memory pressure")
         await self._unload_model(oldest_model)
     
     async def _load_model(self, model_name: str) -> Any:
         """Load a TorchANI model into GPU memory."""
         logger.info(f"Loading model {model_name} into GPU memory")
-        
-        # Check memory pressure and evict if necessary
-        while await self._check_memory_pressure() and self.models_in_memory:
-            await self._evict_oldest_model()
-        
-        # Check if we've reached max models limit
-        while len(self.models_in_memory) >= settings.model_max_loaded:
-            await self._evict_oldest_model()
-        
+
         # Load the appropriate model
         try:
             if model_name == "ANI1ccx":
@@ -97,12 +179,52 @@ class ModelManager:
                 model = torchani.models.ANI1x(periodic_table_index=True)
             else:
                 raise ValueError(f"Unknown model: {model_name}")
-            
-            model = model.to(self.device).double()
-            
+
+            # Size the model on the host, then evict from accounting alone —
+            # no CUDA runtime calls on this path
+            model = model.to(self.dtype)
+            size = sum(p.numel() * p.element_size() for p in model.parameters())
+            budget = self._get_memory_budget()
+            while self.models_in_memory and (
+                self.bytes_used + size > budget
+                or len(self.models_in_memory) >= settings.model_max_loaded
+            ):
+                await self._evict_oldest_model()
+
+            model = model.to(self.device)
+
+            # Optional reduced-precision inference: the per-element MLPs are
+            # weight-bandwidth bound, so running them in bf16 (or int8 on
+            # CPU) translates directly to throughput
+            if settings.model_quantize == "bf16":
+                # Weights stay FP32; forwards run under bf16 autocast (see
+                # autocast_context) so the AEV computation keeps full
+                # precision while the MLP matmuls use tensor cores with
+                # FP32 accumulation
+                if self.device.type != "cuda":
+                    logger.warning("bf16 autocast requires CUDA; running FP32")
+            elif settings.model_quantize == "int8":
+                if self.device.type == "cpu":
+                    model = torch.quantization.quantize_dynamic(
+                        model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+                else:
+                    logger.warning("int8 dynamic quantization requires CPU; skipping")
+
+            # Compile with Inductor so the many small pointwise AEV ops get fused
+            # into larger kernels. dynamic=True because atom count varies per
+            # request; fall back to eager if Dynamo cannot capture the model.
+            try:
+                model = torch.compile(model, mode="reduce-overhead", dynamic=True)
+                logger.info(f"Model {model_name} compiled with torch.compile")
+            except Exception as e:
+                logger.warning(f"torch.compile failed for {model_name}, using eager mode: {e}")
+
             # Store in memory
             self.models_in_memory[model_name] = model
             self.model_last_used[model_name] = time.time()
+            self.model_bytes[model_name] = size
+            self.bytes_used += size
             
             # Cache metadata in Redis
             metadata = {
@@ -113,7 +235,7 @@ class ModelManager:
             await self.redis_client.setex(
                 f"model:{model_name}:metadata",
                 settings.redis_model_ttl,
-                json.dumps(metadata),
+                orjson.dumps(metadata).decode(),
             )
             
             logger.info(f"Model {model_name} loaded successfully")
@@ -123,16 +245,179 @@ class ModelManager:
             logger.error(f"Failed to load model {model_name}: {e}")
             raise
     
+    def autocast_context(self):
+        """Autocast context for reduced-precision inference.
+
+        Under ``model_quantize == "bf16"`` the MLP matmuls run in
+        bfloat16 with FP32 accumulation while the AEV computation
+        (pointwise and norm ops) stays FP32 per autocast's policy.
+        A null context everywhere else.
+        """
+        if settings.model_quantize == "bf16" and self.device.type == "cuda":
+            return torch.autocast("cuda", dtype=torch.bfloat16)
+        return nullcontext()
+
+    async def get_fused_forward(self, model_name: str) -> Any:
+        """Get a fully fused forward callable for a model.
+
+        Compiles the model once with full-graph capture and max-autotune so
+        Inductor emits a single fused kernel chain for the per-species MLPs
+        and energy reduction, keeping intermediates out of global memory.
+        Falls back to the regular forward if full-graph capture fails (e.g.
+        when the AEV computation breaks Dynamo capture).
+        """
+        if model_name in self._fused_forward_cache:
+            return self._fused_forward_cache[model_name]
+
+        model = await self.get_model(model_name)
+        try:
+            fused = torch.compile(model, fullgraph=True, mode="max-autotune")
+            # torch.compile is lazy and never raises at wrap time; run a
+            # probe forward so a full-graph capture failure surfaces here
+            # and falls back, instead of failing (and being cached) on
+            # the first live request
+            species = torch.tensor([[1, 6, 1]], device=self.device)
+            coords = torch.zeros((1, 3, 3), device=self.device, dtype=self.dtype)
+            fused((species, coords))
+            logger.info(f"Compiled fused forward for {model_name}")
+        except Exception as e:
+            logger.warning(f"Full-graph compile failed for {model_name}, using default forward: {e}")
+            fused = model
+
+        self._fused_forward_cache[model_name] = fused
+        return fused
+
+    async def stage_to_device(
+        self, species: torch.Tensor, coords: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Move host species/coords tensors to the device via pinned staging.
+
+        The flattened inputs are copied through a preallocated pinned slot so
+        the host-to-device transfer runs as an async DMA (non_blocking) at
+        full bandwidth. Falls back to a plain .to(device) when the pool is
+        unavailable or the batch exceeds slot capacity.
+        """
+        total = species.numel()
+        if self._pinned_slots is None or total > settings.max_atoms:
+            return species.to(self.device), coords.to(self.device)
+
+        slot = await self._pinned_slots.get()
+        try:
+            # Make sure the previous transfer out of this slot has finished
+            self._slot_events[slot].synchronize()
+
+            self.pinned_species[slot, :total].copy_(species.reshape(-1))
+            self.pinned_coords[slot, :total].copy_(coords.reshape(-1, 3))
+
+            species_dev = (
+                self.pinned_species[slot, :total]
+                .to(self.device, non_blocking=True)
+                .view_as(species)
+            )
+            coords_dev = (
+                self.pinned_coords[slot, :total]
+                .to(self.device, non_blocking=True)
+                .view_as(coords)
+            )
+            self._slot_events[slot].record()
+        finally:
+            self._pinned_slots.put_nowait(slot)
+
+        return species_dev, coords_dev
+
+    def _bucket_atoms(self, n_atoms: int) -> int:
+        """Round an atom count up to the next power-of-2 graph bucket."""
+        bucket = 16
+        while bucket < n_atoms and bucket < settings.max_atoms:
+            bucket *= 2
+        return bucket
+
+    def _capture_graph_with_model(
+        self,
+        model: Any,
+        model_name: str,
+        key: Tuple[str, Tuple[int, ...]],
+        species: torch.Tensor,
+    ) -> Any:
+        """Capture a CUDA graph using an already-loaded model.
+
+        Persistent input buffers are allocated for the caller's padded
+        species, warmed up on a side stream, then a single energy+force
+        evaluation is captured for replay with `copy_`-ed coordinates.
+        """
+        n_padded = species.shape[1]
+        species_buf = species.detach().clone()
+        # Spread the warmup atoms out so the pre-capture passes don't
+        # evaluate coincident positions
+        coords_buf = torch.rand(
+            (1, n_padded, 3), dtype=self.dtype, device=self.device
+        ).mul_(10.0).requires_grad_(True)
+
+        # Warm up on a side stream so allocations don't pollute the capture
+        side_stream = torch.cuda.Stream()
+        side_stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(side_stream):
+            for _ in range(3):
+                with self.autocast_context():
+                    energy = model((species_buf, coords_buf)).energies
+                forces = -torch.autograd.grad(energy.sum(), coords_buf)[0]
+        torch.cuda.current_stream().wait_stream(side_stream)
+
+        graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(graph):
+            with self.autocast_context():
+                energy = model((species_buf, coords_buf)).energies
+            forces = -torch.autograd.grad(energy.sum(), coords_buf)[0]
+
+        entry = (graph, species_buf, coords_buf, energy, forces)
+        self.graph_cache[key] = entry
+        logger.info(f"Captured CUDA graph for {model_name} at {n_padded} atoms")
+        return entry
+
+    def graph_entry_sync(
+        self, model_name: str, model: Any, species: torch.Tensor
+    ) -> Optional[Any]:
+        """Get (capturing if needed) the graph entry for a padded species.
+
+        Synchronous variant for callers that already hold the model, e.g.
+        the device-resident optimization loop. Graphs are keyed by the
+        exact padded species sequence rather than the atom count alone:
+        ANI's per-species masking bakes composition-dependent shapes
+        into the capture, so replaying a graph captured for a different
+        composition would produce silently wrong energies. Returns None
+        when capture has already failed for this key, letting callers
+        fall back to the eager path without re-paying the warmup cost.
+        """
+        key = (model_name, tuple(species[0].tolist()))
+        if key in self._graph_capture_failed:
+            return None
+        if key not in self.graph_cache:
+            try:
+                self._capture_graph_with_model(model, model_name, key, species)
+            except Exception:
+                self._graph_capture_failed.add(key)
+                raise
+        return self.graph_cache[key]
+
     async def _unload_model(self, model_name: str):
         """Unload a model from GPU memory."""
-        if model_name not in self.models_in_memory:
-            return
-        
-        logger.info(f"Unloading model {model_name} from GPU memory")
-        
-        model = self.models_in_memory[model_name]
-        del self.models_in_memory[model_name]
-        del self.model_last_used[model_name]
+        async with self._map_lock:
+            if model_name not in self.models_in_memory:
+                return
+
+            logger.info(f"Unloading model {model_name} from GPU memory")
+
+            model = self.models_in_memory.pop(model_name)
+            self.model_last_used.pop(model_name, None)
+            self.bytes_used -= self.model_bytes.pop(model_name, 0)
+
+        # Drop any CUDA graphs and fused forwards captured for this model
+        for key in [k for k in self.graph_cache if k[0] == model_name]:
+            del self.graph_cache[key]
+        self._graph_capture_failed = {
+            k for k in self._graph_capture_failed if k[0] != model_name
+        }
+        self._fused_forward_cache.pop(model_name, None)
         
         # Clear from GPU
         del model
@@ -142,28 +427,38 @@ class ModelManager:
         # Remove from Redis cache
         await self.redis_client.delete(f"model:{model_name}:metadata")
     
+    def _get_model_lock(self, model_name: str) -> asyncio.Lock:
+        """Get (lazily creating) the load lock for a model."""
+        if model_name not in self._model_locks:
+            self._model_locks[model_name] = asyncio.Lock()
+        return self._model_locks[model_name]
+
     async def get_model(self, model_name: str) -> Any:
         """Get a model, loading it if necessary."""
-        async with self.lock:
-            # Check if model is already in memory
+        # Fast path: cache hits need only dict reads (atomic in asyncio),
+        # so concurrent requests on loaded models don't serialize
+        if model_name in self.models_in_memory:
+            self.models_in_memory.move_to_end(model_name)
+            self.model_last_used[model_name] = time.time()
+            # Grab the reference before awaiting: a concurrent request
+            # may evict this model while the TTL round-trip is in flight
+            model = self.models_in_memory[model_name]
+
+            # Extend TTL in Redis
+            await self.redis_client.expire(
+                f"model:{model_name}:metadata",
+                settings.redis_model_ttl,
+            )
+
+            return model
+
+        async with self._get_model_lock(model_name):
+            # Another coroutine may have loaded it while we waited
             if model_name in self.models_in_memory:
+                self.models_in_memory.move_to_end(model_name)
                 self.model_last_used[model_name] = time.time()
-                
-                # Extend TTL in Redis
-                await self.redis_client.expire(
-                    f"model:{model_name}:metadata",
-                    settings.redis_model_ttl,
-                )
-                
                 return self.models_in_memory[model_name]
-            
-            # Check Redis for metadata (model might be loadable)
-            metadata = await self.redis_client.get(f"model:{model_name}:metadata")
-            if metadata:
-                # Model was recently used, load it
-                return await self._load_model(model_name)
-            
-            # First time loading this model
+
             return await self._load_model(model_name)
     
     async def list_models(self) -> Dict[str, Dict[str, Any]]:
@@ -178,7 +473,7 @@ class ModelManager:
                 "available": True,
                 "loaded": model_name in self.models_in_memory,
                 "last_used": self.model_last_used.get(model_name),
-                "metadata": json.loads(metadata) if metadata else None,
+                "metadata": orjson.loads(metadata) if metadata else None,
             }
         
         # Add GPU memory stats
@@ -192,26 +487,17 @@ class ModelManager:
         
         return result
     
-    def get_supported_elements(self, model_name: str) -> set:
+    def is_known_model(self, model_name: str) -> bool:
+        """Whether the name refers to a loadable TorchANI model."""
+        return model_name in _ANI_ELEMENTS
+
+    def get_supported_elements(self, model_name: str) -> frozenset:
         """Get the set of elements supported by a model."""
-        element_sets = {
-            "ANI1ccx": {1, 6, 7, 8},  # H, C, N, O
-            "ANI1x": {1, 6, 7, 8},     # H, C, N, O
-            "ANI2x": {1, 6, 7, 8, 9, 16, 17},  # H, C, N, O, F, S, Cl
-        }
-        return element_sets.get(model_name, set())
-    
+        return _ANI_ELEMENTS.get(model_name, frozenset())
+
     def select_best_model(self, elements: set) -> Optional[str]:
         """Select the best model for a given set of elements."""
-        # Check each model in order of preference
-        model_preference = ["ANI2x", "ANI1ccx", "ANI1x"]
-        
-        for model_name in model_preference:
-            supported = self.get_supported_elements(model_name)
-            if elements.issubset(supported):
-                return model_name
-        
-        return None
+        return _select_best_model(frozenset(elements))
     
     @asynccontextmanager
     async def get_model_context(self, model_name: str):
@@ -1,27 +1,305 @@
 """Molecular structure optimization using TorchANI."""
 
+import asyncio
+import functools
+import hashlib
+import io
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+import pickle
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import ase
 import ase.optimize
+import ase.units
 import numpy as np
 import torch
 from rdkit import Chem
 from rdkit.Chem import AllChem
+from redis import asyncio as aioredis
 
+from app.config import settings
 from app.core.model_manager import model_manager
 
 logger = logging.getLogger(__name__)
 
+# Binary-safe client for the conformer cache, created on first use.
+# The model manager's client decodes responses as UTF-8, which would
+# mangle the pickled payloads stored here.
+_conformer_redis: Optional[aioredis.Redis] = None
+
+
+async def _get_conformer_redis() -> aioredis.Redis:
+    """Get (lazily creating) the binary Redis client for conformers."""
+    global _conformer_redis
+    if _conformer_redis is None:
+        _conformer_redis = await aioredis.from_url(
+            settings.redis_url,
+            decode_responses=False,
+        )
+    return _conformer_redis
+
+# Element symbols for XYZ emission, plus a (Z, 2) uint8 code table for
+# the jitted formatter (row 0 stays empty for unknown elements)
+_XYZ_SYMBOLS = {
+    1: "H", 6: "C", 7: "N", 8: "O",
+    9: "F", 16: "S", 17: "Cl"
+}
+_SYM_CODES = np.zeros((119, 2), dtype=np.uint8)
+for _z, _sym in _XYZ_SYMBOLS.items():
+    _SYM_CODES[_z, 0] = ord(_sym[0])
+    if len(_sym) > 1:
+        _SYM_CODES[_z, 1] = ord(_sym[1])
+
+# String LUT indexed by atomic number so symbol assignment in the
+# fallback path is one vectorized gather instead of per-atom dict
+# lookups; unknown elements keep the "X{Z}" placeholder
+_SYMBOL_LUT = np.array(
+    [_XYZ_SYMBOLS.get(z, f"X{z}") for z in range(119)], dtype="<U4"
+)
+
+try:
+    import numba
+
+    @numba.njit(cache=True)
+    def _fill_xyz(elements, coords, out, sym_codes):  # pragma: no cover
+        """Write '%-2s %12.6f %12.6f %12.6f\\n' atom lines into out bytes."""
+        pos = 0
+        for i in range(elements.shape[0]):
+            z = elements[i]
+            out[pos] = sym_codes[z, 0]
+            out[pos + 1] = sym_codes[z, 1] if sym_codes[z, 1] != 0 else 32
+            pos += 2
+            for j in range(3):
+                out[pos] = 32
+                pos += 1
+                value = coords[i, j]
+                negative = value < 0.0
+                if negative:
+                    value = -value
+                scaled = int(value * 1e6 + 0.5)
+                ipart = scaled // 1000000
+                frac = scaled % 1000000
+                end = pos + 12
+                p = end - 1
+                for _ in range(6):
+                    out[p] = 48 + frac % 10
+                    frac //= 10
+                    p -= 1
+                out[p] = 46  # '.'
+                p -= 1
+                if ipart == 0:
+                    out[p] = 48
+                    p -= 1
+                else:
+                    while ipart > 0:
+                        out[p] = 48 + ipart % 10
+                        ipart //= 10
+                        p -= 1
+                if negative:
+                    out[p] = 45  # '-'
+                    p -= 1
+                while p >= pos:
+                    out[p] = 32
+                    p -= 1
+                pos = end
+            out[pos] = 10  # '\n'
+            pos += 1
+        return pos
+
+except ImportError:
+    _fill_xyz = None
+
 
 class MolecularOptimizer:
     """Handles molecular structure optimization with TorchANI."""
-    
+
+    def __init__(self):
+        # Dedicated copy stream + pinned staging buffer so coordinate
+        # uploads overlap compute from concurrent requests sharing the
+        # GPU; created lazily since CUDA may not be up at import time
+        self._copy_stream: Optional[Any] = None
+        self._pinned_coord_buf: Optional[torch.Tensor] = None
+        self._copy_done: Optional[Any] = None
+
+    def _stage_coords(self, coordinates: np.ndarray) -> torch.Tensor:
+        """
+        Upload (N, 3) coordinates as a (1, N, 3) device tensor.
+
+        On CUDA the host array is written into a pinned staging buffer
+        and copied on a dedicated stream, so the DMA overlaps compute
+        already in flight; the current stream waits on the copy before
+        reading. CPU devices and oversized molecules take a plain copy.
+        """
+        coords_np = np.ascontiguousarray(coordinates)
+        device = model_manager.device
+        dtype = model_manager.dtype
+
+        if device.type != "cuda" or coords_np.shape[0] > settings.max_atoms:
+            return torch.as_tensor(
+                coords_np, dtype=dtype, device=device
+            ).unsqueeze(0)
+
+        if self._copy_stream is None:
+            self._copy_stream = torch.cuda.Stream()
+            self._pinned_coord_buf = torch.empty(
+                settings.max_atoms, 3, dtype=dtype, pin_memory=True
+            )
+            self._copy_done = torch.cuda.Event()
+
+        # Don't overwrite the pinned buffer while a previous DMA may
+        # still be reading from it
+        self._copy_done.synchronize()
+
+        n = coords_np.shape[0]
+        with torch.cuda.stream(self._copy_stream):
+            self._pinned_coord_buf[:n].copy_(torch.from_numpy(coords_np))
+            gpu_coords = self._pinned_coord_buf[:n].to(device, non_blocking=True)
+            self._copy_done.record(self._copy_stream)
+        torch.cuda.current_stream().wait_stream(self._copy_stream)
+        return gpu_coords.unsqueeze(0)
+
+    def _pad_to_bucket(
+        self, species: torch.Tensor, coords: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Pad (1, N) species / (1, N, 3) coords to the next atom bucket.
+
+        Specializing on a handful of bucket sizes instead of every atom
+        count lets torch.compile and CUDA-graph caches hit across a
+        heterogeneous workload. Padding atoms carry ANI's -1 sentinel
+        and zero coordinates, so the species masking drops them.
+        """
+        n_atoms = species.shape[1]
+        n_bucket = model_manager._bucket_atoms(n_atoms)
+        if n_bucket <= n_atoms:
+            return species, coords
+        pad = n_bucket - n_atoms
+        species = torch.nn.functional.pad(species, (0, pad), value=-1)
+        coords = torch.nn.functional.pad(coords, (0, 0, 0, pad))
+        return species, coords
+
+    def _optimize_on_device(
+        self,
+        species: torch.Tensor,
+        coords: torch.Tensor,
+        model: Any,
+        fmax: float,
+        max_steps: int,
+        model_name: Optional[str] = None,
+    ) -> Tuple[float, torch.Tensor, torch.Tensor, int, bool]:
+        """
+        Run LBFGS with coordinates resident on the model device.
+
+        ASE's optimizers keep their state in NumPy and round-trip
+        positions/forces between host and device on every step. Here the
+        coordinates stay a device tensor driven by torch.optim.LBFGS with
+        a strong-Wolfe line search; only the final energy, forces, and
+        positions are copied back to the host.
+
+        When `settings.use_cuda_graphs` is on, each closure evaluation
+        replays a captured forward+backward graph (cached per atom bucket
+        in the model manager) instead of relaunching kernels: coordinates
+        are `copy_`-ed into the graph's static buffers and the gradient is
+        read back from its static force output.
+
+        Args:
+            species: Atomic numbers tensor (1, N)
+            coords: Coordinates tensor (1, N, 3) on the model device
+            model: TorchANI model
+            fmax: Force convergence criterion
+            max_steps: Maximum optimization steps
+            model_name: Model name, required for the CUDA-graph cache
+
+        Returns:
+            Tuple of (energy in eV, forces in eV/A, coordinates,
+            steps_taken, converged)
+        """
+        n_atoms = species.shape[1]
+        # Specialize on bucketed atom counts so the compile and graph
+        # caches hit; padding is sliced back off on readback
+        species, coords = self._pad_to_bucket(species, coords)
+        coords = coords.detach().requires_grad_(True)
+
+        graph_entry = None
+        if settings.use_cuda_graphs and coords.is_cuda and model_name is not None:
+            try:
+                # Graphs are keyed by the padded species sequence, so the
+                # replay below always matches this composition; None means
+                # capture failed before and the eager path is used
+                graph_entry = model_manager.graph_entry_sync(
+                    model_name, model, species
+                )
+            except Exception as e:
+                logger.warning(f"CUDA graph capture failed, using eager path: {e}")
+
+        # max_iter=1 makes each opt.step() a single LBFGS iteration, so
+        # max_steps and steps_taken count individual steps like ASE's
+        # optimizers do; curvature history persists across step() calls
+        opt = torch.optim.LBFGS(
+            [coords],
+            max_iter=1,
+            history_size=20,
+            line_search_fn="strong_wolfe",
+        )
+
+        if graph_entry is not None:
+            # species_buf already holds this composition (it's the cache key)
+            graph, _species_buf, coords_buf, energy_buf, forces_buf = graph_entry
+
+            def closure() -> torch.Tensor:
+                opt.zero_grad()
+                with torch.no_grad():
+                    coords_buf.copy_(coords)
+                graph.replay()
+                # forces = -dE/dx, so the optimizer's gradient is -forces
+                coords.grad = -forces_buf.detach().clone()
+                return energy_buf.detach().sum()
+        else:
+            def closure() -> torch.Tensor:
+                opt.zero_grad()
+                with model_manager.autocast_context():
+                    energy = model((species, coords)).energies.sum()
+                energy.backward()
+                return energy
+
+        # TorchANI works in Hartree; the public API reports eV / eV/A
+        # like the ASE path (whose calculator applies the same factor),
+        # so fmax is compared on the Hartree scale and the outputs are
+        # converted on return
+        fmax_hartree = fmax / ase.units.Hartree
+
+        steps_taken = 0
+        converged = False
+        for _ in range(max_steps):
+            opt.step(closure)
+            steps_taken += 1
+            # grad can be absent if the step bailed before evaluating
+            # the closure (and with max_steps=0 it is never set at all)
+            if coords.grad is None:
+                continue
+            force_max = coords.grad.norm(dim=-1).max()
+            if float(force_max) < fmax_hartree:
+                converged = True
+                break
+
+        # Final energy and forces at the optimized geometry; slice the
+        # padding atoms back off before returning
+        final_coords = coords.detach().requires_grad_(True)
+        energy = model((species, final_coords)).energies.sum()
+        forces = -torch.autograd.grad(energy, final_coords)[0]
+
+        return (
+            float(energy.item()) * ase.units.Hartree,
+            forces[:, :n_atoms].detach() * ase.units.Hartree,
+            final_coords[:, :n_atoms].detach(),
+            steps_taken,
+            converged,
+        )
+
     async def optimize_structure(
         self,
         coordinates: np.ndarray,
-        elements: List[int],
+        elements: Union[List[int], np.ndarray],
         model_name: Optional[str] = None,
         charge: int = 0,
         max_steps: int = 1000,
@@ -38,29 +316,58 @@ class MolecularOptimizer:
             charge: Molecular charge
             max_steps: Maximum optimization steps
             fmax: Force convergence criterion
-            optimizer: Optimization algorithm (LBFGS, BFGS, FIRE)
-        
+            optimizer: Optimization algorithm. LBFGS runs on-device via
+                torch.optim; ASE-LBFGS, BFGS, and FIRE go through ASE.
+
         Returns:
             Dictionary with optimized structure and energy
         """
         try:
+            # One contiguous int64 array for the whole request; the
+            # derived device tensor is memoized per composition
+            elements = np.ascontiguousarray(elements, dtype=np.int64)
+
             # Auto-select model if not specified
             if model_name is None:
-                element_set = set(elements)
+                element_set = set(elements.tolist())
                 model_name = model_manager.select_best_model(element_set)
                 if model_name is None:
                     raise ValueError(f"No model supports elements: {element_set}")
-            
+
             # Get model from manager
             async with model_manager.get_model_context(model_name) as model:
-                # Create ASE Atoms object
+                # Device-resident path: no host round-trips per step
+                if optimizer == "LBFGS":
+                    species = self._species_tensor(tuple(elements.tolist()))
+                    coords_t = self._stage_coords(coordinates)
+
+                    energy, forces_t, opt_coords, steps_taken, converged = (
+                        self._optimize_on_device(
+                            species, coords_t, model, fmax, max_steps, model_name
+                        )
+                    )
+
+                    # Coordinates/forces stay NumPy; orjson serializes the
+                    # buffers directly without boxing every float
+                    return {
+                        "success": converged,
+                        "model_used": model_name,
+                        "energy": energy,
+                        "coordinates": opt_coords[0].cpu().numpy(),
+                        "forces": forces_t[0].cpu().numpy(),
+                        "steps_taken": steps_taken,
+                        "charge": charge,
+                        "elements": elements.tolist(),
+                    }
+
+                # ASE fallback path for the remaining algorithms
                 molecule = ase.Atoms(numbers=elements, positions=coordinates)
-                
+
                 # Set calculator
                 molecule.set_calculator(model.ase())
-                
+
                 # Choose optimizer
-                if optimizer == "LBFGS":
+                if optimizer == "ASE-LBFGS":
                     opt = ase.optimize.LBFGS(molecule, memory=1000)
                 elif optimizer == "BFGS":
                     opt = ase.optimize.BFGS(molecule)
@@ -81,11 +388,11 @@ class MolecularOptimizer:
                     "success": converged,
                     "model_used": model_name,
                     "energy": float(energy),
-                    "coordinates": optimized_coords.tolist(),
-                    "forces": forces.tolist(),
+                    "coordinates": np.ascontiguousarray(optimized_coords),
+                    "forces": np.ascontiguousarray(forces),
                     "steps_taken": opt.nsteps,
                     "charge": charge,
-                    "elements": elements,
+                    "elements": elements.tolist(),
                 }
                 
                 return result
@@ -94,54 +401,224 @@ class MolecularOptimizer:
             logger.error(f"Optimization failed: {e}")
             raise
     
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _species_tensor(elements: Tuple[int, ...]) -> torch.Tensor:
+        """Device-resident (1, N) species tensor, memoized per element tuple."""
+        return torch.as_tensor(
+            np.asarray(elements, dtype=np.int64),
+            device=model_manager.device,
+        ).unsqueeze(0)
+
+    def _single_point_on_device(
+        self,
+        species: torch.Tensor,
+        coords: torch.Tensor,
+        model: Any,
+    ) -> Tuple[float, torch.Tensor]:
+        """
+        One forward+backward for energy and forces, no ASE adapter.
+
+        ASE's calculator runs separate evaluations for
+        get_potential_energy() and get_forces(); here a single backward
+        through the energy yields both. Readback costs one stream sync:
+        the force copy is enqueued non-blocking into pinned host memory
+        before energy.item() flushes the stream, so both arrive together.
+
+        Args:
+            species: Atomic numbers tensor (1, N)
+            coords: Coordinates tensor (1, N, 3) on the model device
+            model: TorchANI model
+
+        Returns:
+            Tuple of (energy in eV, forces in eV/A on the host)
+        """
+        coords = coords.detach().requires_grad_(True)
+        with model_manager.autocast_context():
+            energy = model((species, coords)).energies.sum()
+        # Hartree -> eV/A on device, before the D2H copy
+        forces = -torch.autograd.grad(energy, coords)[0] * ase.units.Hartree
+
+        if coords.is_cuda:
+            forces_host = torch.empty(
+                forces.shape, dtype=forces.dtype, pin_memory=True
+            )
+            forces_host.copy_(forces.detach(), non_blocking=True)
+            # item() is the only sync; it also completes the in-flight
+            # D2H force copy queued on the same stream
+            return float(energy.item()) * ase.units.Hartree, forces_host
+
+        return float(energy.item()) * ase.units.Hartree, forces.detach()
+
     async def calculate_energy(
         self,
         coordinates: np.ndarray,
-        elements: List[int],
+        elements: Union[List[int], np.ndarray],
         model_name: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         Calculate single-point energy without optimization.
-        
+
         Args:
             coordinates: Atomic coordinates (N, 3)
             elements: Atomic numbers for each atom
             model_name: TorchANI model to use (auto-select if None)
-        
+
         Returns:
             Dictionary with energy and forces
         """
         try:
+            elements = np.ascontiguousarray(elements, dtype=np.int64)
+
             # Auto-select model if not specified
             if model_name is None:
-                element_set = set(elements)
+                element_set = set(elements.tolist())
                 model_name = model_manager.select_best_model(element_set)
                 if model_name is None:
                     raise ValueError(f"No model supports elements: {element_set}")
-            
+
             # Get model from manager
             async with model_manager.get_model_context(model_name) as model:
-                # Create ASE Atoms object
-                molecule = ase.Atoms(numbers=elements, positions=coordinates)
-                molecule.set_calculator(model.ase())
-                
-                # Calculate energy and forces
-                energy = molecule.get_potential_energy()
-                forces = molecule.get_forces()
-                
+                species = self._species_tensor(tuple(elements.tolist()))
+                coords_t = self._stage_coords(coordinates)
+
+                energy, forces = self._single_point_on_device(species, coords_t, model)
+
                 result = {
                     "model_used": model_name,
-                    "energy": float(energy),
-                    "forces": forces.tolist(),
-                    "elements": elements,
+                    "energy": energy,
+                    "forces": forces[0].cpu().numpy(),
+                    "elements": elements.tolist(),
                 }
-                
+
                 return result
-                
+
         except Exception as e:
             logger.error(f"Energy calculation failed: {e}")
             raise
     
+    async def batch_optimize_structures(
+        self,
+        structures: List[Tuple[np.ndarray, List[int]]],
+        model_name: str,
+        max_steps: int = 1000,
+        fmax: float = 1e-6,
+    ) -> List[Dict[str, Any]]:
+        """
+        Optimize many structures in one padded tensor pass.
+
+        Molecules are stacked into padded (B, N_max) species and
+        (B, N_max, 3) coordinate tensors (species padded with ANI's -1
+        sentinel) and relaxed with a vectorized FIRE integrator, so each
+        step costs one forward+backward for the whole batch instead of B
+        separate evaluations. Converged molecules are frozen via a
+        per-row mask until the batch finishes.
+
+        Args:
+            structures: List of (coordinates, elements) tuples
+            model_name: TorchANI model to use
+            max_steps: Maximum optimization steps
+            fmax: Force convergence criterion
+
+        Returns:
+            List of optimization results in input order
+        """
+        model = await model_manager.get_model(model_name)
+        dtype = model_manager.dtype
+
+        n_batch = len(structures)
+        n_max = max(len(elements) for _, elements in structures)
+
+        species = torch.full((n_batch, n_max), -1, dtype=torch.long)
+        coords = torch.zeros((n_batch, n_max, 3), dtype=dtype)
+        for i, (coords_np, elements) in enumerate(structures):
+            n = len(elements)
+            species[i, :n] = torch.as_tensor(np.asarray(elements, dtype=np.int64))
+            coords[i, :n] = torch.as_tensor(np.asarray(coords_np), dtype=dtype)
+
+        species, coords = await model_manager.stage_to_device(species, coords)
+        coords = coords.clone()
+        atom_mask = (species >= 0).unsqueeze(-1)
+
+        def energy_forces(positions: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+            positions = positions.detach().requires_grad_(True)
+            with model_manager.autocast_context():
+                energies = model((species, positions)).energies
+            forces = -torch.autograd.grad(energies.sum(), positions)[0]
+            # Hartree -> eV / eV/A so the results match the other paths
+            # and the ASE-default FIRE parameters below keep the force
+            # scale they were tuned for
+            return (
+                energies.detach() * ase.units.Hartree,
+                forces * atom_mask * ase.units.Hartree,
+            )
+
+        # Vectorized FIRE with per-molecule timestep, mixing, and counters
+        # (parameters follow ase.optimize.FIRE defaults)
+        dt = torch.full((n_batch, 1, 1), 0.1, dtype=dtype, device=coords.device)
+        alpha = torch.full((n_batch, 1, 1), 0.1, dtype=dtype, device=coords.device)
+        n_pos = torch.zeros(n_batch, dtype=torch.long, device=coords.device)
+        velocity = torch.zeros_like(coords)
+        active = torch.ones(n_batch, dtype=torch.bool, device=coords.device)
+        dt_max, n_min, f_inc, f_dec, alpha_start, f_alpha = 1.0, 5, 1.1, 0.5, 0.1, 0.99
+        max_shift = 0.2
+
+        energies, forces = energy_forces(coords)
+        steps_taken = 0
+
+        for _ in range(max_steps):
+            force_max = forces.norm(dim=-1).max(dim=1).values
+            active = active & (force_max > fmax)
+            if not bool(active.any()):
+                break
+            steps_taken += 1
+
+            velocity = velocity + dt * forces
+            power = (forces * velocity).sum(dim=(1, 2))
+            downhill = (power > 0).view(-1, 1, 1)
+
+            v_norm = velocity.flatten(1).norm(dim=1).view(-1, 1, 1)
+            f_norm = forces.flatten(1).norm(dim=1).clamp_min(1e-10).view(-1, 1, 1)
+            mixed = (1.0 - alpha) * velocity + alpha * v_norm * forces / f_norm
+            velocity = torch.where(downhill, mixed, torch.zeros_like(velocity))
+
+            grow = downhill.view(-1) & (n_pos > n_min)
+            dt = torch.where(grow.view(-1, 1, 1), (dt * f_inc).clamp_max(dt_max), dt)
+            alpha = torch.where(grow.view(-1, 1, 1), alpha * f_alpha, alpha)
+            dt = torch.where(downhill, dt, dt * f_dec)
+            alpha = torch.where(downhill, alpha, torch.full_like(alpha, alpha_start))
+            n_pos = torch.where(downhill.view(-1), n_pos + 1, torch.zeros_like(n_pos))
+
+            shift = dt * velocity
+            shift_norm = shift.norm(dim=-1, keepdim=True).clamp_min(1e-10)
+            shift = torch.where(shift_norm > max_shift, shift * max_shift / shift_norm, shift)
+
+            # Frozen (converged) molecules stop moving but stay in the batch
+            coords = coords + shift * active.view(-1, 1, 1) * atom_mask
+            energies, forces = energy_forces(coords)
+
+        force_max = forces.norm(dim=-1).max(dim=1).values
+        coords_np = coords.detach().cpu().numpy()
+        forces_np = forces.detach().cpu().numpy()
+        energies_np = energies.cpu().numpy()
+        converged_np = (force_max <= fmax).cpu().numpy()
+
+        results = []
+        for i, (_, elements) in enumerate(structures):
+            n = len(elements)
+            results.append({
+                "success": bool(converged_np[i]),
+                "model_used": model_name,
+                "energy": float(energies_np[i]),
+                "coordinates": coords_np[i, :n],
+                "forces": forces_np[i, :n],
+                "steps_taken": steps_taken,
+                "charge": 0,
+                "elements": np.asarray(elements).tolist(),
+            })
+
+        return results
+
     async def batch_optimize(
         self,
         structures: List[Tuple[np.ndarray, List[int]]],
@@ -150,55 +627,184 @@ class MolecularOptimizer:
     ) -> List[Dict[str, Any]]:
         """
         Optimize multiple structures in batch.
-        
+
+        Small molecules (up to settings.max_batch_atoms) are relaxed
+        together through the batched tensor path; larger ones fall back
+        to the per-molecule optimizer.
+
         Args:
             structures: List of (coordinates, elements) tuples
             model_name: TorchANI model to use
             **kwargs: Additional optimization parameters
-        
+
         Returns:
             List of optimization results
         """
-        results = []
-        
-        for coords, elements in structures:
+        results: List[Optional[Dict[str, Any]]] = [None] * len(structures)
+
+        # Auto-select one model covering the whole batch if not specified
+        batched_model = model_name
+        if batched_model is None:
+            all_elements = set()
+            for _, elements in structures:
+                all_elements.update(int(e) for e in elements)
+            batched_model = model_manager.select_best_model(all_elements)
+
+        batched_indices = [
+            i for i, (_, elements) in enumerate(structures)
+            if len(elements) <= settings.max_batch_atoms
+        ]
+
+        if batched_model is not None and batched_indices:
+            try:
+                batched_results = await self.batch_optimize_structures(
+                    [structures[i] for i in batched_indices],
+                    batched_model,
+                    max_steps=kwargs.get("max_steps", 1000),
+                    fmax=kwargs.get("fmax", 1e-6),
+                )
+                for i, result in zip(batched_indices, batched_results):
+                    results[i] = result
+            except Exception as e:
+                logger.error(f"Batched optimization failed, falling back: {e}")
+
+        # Per-molecule fallback for oversized structures (and any leftovers)
+        for i, (coords, elements) in enumerate(structures):
+            if results[i] is not None:
+                continue
             try:
-                result = await self.optimize_structure(
+                results[i] = await self.optimize_structure(
                     coords, elements, model_name, **kwargs
                 )
-                results.append(result)
             except Exception as e:
                 logger.error(f"Failed to optimize structure: {e}")
-                results.append({
+                results[i] = {
                     "success": False,
                     "error": str(e),
-                    "elements": elements,
-                })
-        
+                    "elements": np.asarray(elements).tolist(),
+                }
+
         return results
     
-    def smiles_to_structure(self, smiles: str) -> Tuple[np.ndarray, List[int]]:
+    # Bump to invalidate cached conformers when the embedding protocol
+    # (RDKit seed, MMFF variant, conformer count, ...) or the stored
+    # byte layout changes
+    _CONFORMER_CACHE_VERSION = 3
+
+    @staticmethod
+    @functools.lru_cache(maxsize=10000)
+    def _embed_structure(canonical_smiles: str) -> Tuple[bytes, bytes]:
+        """
+        Embed a canonical SMILES; cached in-process as immutable bytes.
+
+        Several conformers are embedded and MMFF-relaxed in parallel
+        (numThreads=0 uses all cores) and the lowest-energy one is kept,
+        which gives the ANI optimizer a better starting geometry than a
+        single random embedding.
+        """
+        mol = Chem.MolFromSmiles(canonical_smiles)
+        if mol is None:
+            raise ValueError(f"Invalid SMILES: {canonical_smiles}")
+
+        mol = Chem.AddHs(mol)
+        conf_ids = AllChem.EmbedMultipleConfs(
+            mol,
+            numConfs=settings.num_conformers,
+            randomSeed=42,
+            numThreads=0,
+        )
+        if not conf_ids:
+            raise ValueError(f"Conformer embedding failed for: {canonical_smiles}")
+
+        energies = AllChem.MMFFOptimizeMoleculeConfs(
+            mol, numThreads=0, mmffVariant="MMFF94s"
+        )
+        best = min(
+            range(len(conf_ids)),
+            key=lambda i: energies[i][1] if energies[i][0] == 0 else float("inf"),
+        )
+
+        conf = mol.GetConformer(conf_ids[best])
+        coords = np.asarray(conf.GetPositions(), dtype=np.float64)
+        # Single array fill instead of a boxed Python int per atom
+        elements = np.fromiter(
+            (atom.GetAtomicNum() for atom in mol.GetAtoms()),
+            dtype=np.int64,
+            count=mol.GetNumAtoms(),
+        )
+
+        return coords.tobytes(), elements.tobytes()
+
+    def smiles_to_structure(self, smiles: str) -> Tuple[np.ndarray, np.ndarray]:
         """
         Convert SMILES string to 3D structure.
-        
+
+        Embedding results are cached in-process (lru_cache on the
+        canonicalized SMILES), so repeated SMILES in a batch pay only
+        one MMFF pre-optimization.
+
         Args:
             smiles: SMILES string
-        
+
         Returns:
-            Tuple of (coordinates, atomic_numbers)
+            Tuple of (coordinates, atomic_numbers) arrays
         """
         mol = Chem.MolFromSmiles(smiles)
         if mol is None:
             raise ValueError(f"Invalid SMILES: {smiles}")
-        
-        mol = Chem.AddHs(mol)
-        AllChem.EmbedMolecule(mol, randomSeed=42)
-        AllChem.MMFFOptimizeMolecule(mol)
-        
-        conf = mol.GetConformer()
-        coords = conf.GetPositions()
-        elements = [atom.GetAtomicNum() for atom in mol.GetAtoms()]
-        
+
+        coords_bytes, elements_bytes = self._embed_structure(Chem.MolToSmiles(mol))
+        coords = np.frombuffer(coords_bytes, dtype=np.float64).reshape(-1, 3).copy()
+        elements = np.frombuffer(elements_bytes, dtype=np.int64).copy()
+        return coords, elements
+
+    def _conformer_cache_key(self, smiles: str) -> str:
+        """Redis key for a cached conformer, versioned for invalidation."""
+        digest = hashlib.blake2b(smiles.encode(), digest_size=16).hexdigest()
+        return f"smi:v{self._CONFORMER_CACHE_VERSION}:{digest}"
+
+    async def smiles_to_structure_cached(
+        self, smiles: str
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Two-tier cached SMILES conversion: Redis in front of the
+        in-process LRU, so conformers survive worker restarts and are
+        shared across processes. Misses run the RDKit embedding in a
+        worker thread and write back with the result TTL.
+
+        Args:
+            smiles: SMILES string
+
+        Returns:
+            Tuple of (coordinates, atomic_numbers)
+        """
+        key = self._conformer_cache_key(smiles)
+
+        try:
+            redis_client = await _get_conformer_redis()
+            cached = await redis_client.get(key)
+        except Exception as e:
+            logger.warning(f"Conformer cache read failed: {e}")
+            redis_client = None
+            cached = None
+        if cached is not None:
+            coords_bytes, elements_bytes = pickle.loads(cached)
+            coords = np.frombuffer(coords_bytes, dtype=np.float64).reshape(-1, 3)
+            elements = np.frombuffer(elements_bytes, dtype=np.int64)
+            return coords.copy(), elements.copy()
+
+        coords, elements = await asyncio.to_thread(self.smiles_to_structure, smiles)
+
+        if redis_client is not None:
+            try:
+                value = pickle.dumps((
+                    coords.astype(np.float64).tobytes(),
+                    np.ascontiguousarray(elements, dtype=np.int64).tobytes(),
+                ))
+                await redis_client.setex(key, settings.redis_result_ttl, value)
+            except Exception as e:
+                logger.warning(f"Conformer cache write failed: {e}")
+
         return coords, elements
     
     def structure_to_xyz(
@@ -210,28 +816,44 @@ class MolecularOptimizer:
         """
         Convert structure to XYZ format.
         
+        Atom lines are emitted by a Numba-jitted byte formatter when
+        numba is installed, every element has a tabulated symbol, and
+        the coordinates fit the fixed 12.6f field; otherwise formatting
+        is vectorized through a single np.savetxt call.
+
         Args:
             coordinates: Atomic coordinates
             elements: Atomic numbers
             comment: Comment line for XYZ file
-        
+
         Returns:
             XYZ format string
         """
-        # Element symbols
-        symbols = {
-            1: "H", 6: "C", 7: "N", 8: "O",
-            9: "F", 16: "S", 17: "Cl"
-        }
-        
-        lines = [str(len(elements)), comment]
-        
-        for i, (elem, coord) in enumerate(zip(elements, coordinates)):
-            symbol = symbols.get(elem, f"X{elem}")
-            x, y, z = coord
-            lines.append(f"{symbol:2s} {x:12.6f} {y:12.6f} {z:12.6f}")
-        
-        return "\n".join(lines)
+        elements_np = np.ascontiguousarray(elements, dtype=np.int64)
+        coords_np = np.ascontiguousarray(coordinates, dtype=np.float64)
+
+        if (
+            _fill_xyz is not None
+            and elements_np.size
+            and elements_np.min() >= 1
+            and elements_np.max() < _SYM_CODES.shape[0]
+            and np.all(_SYM_CODES[elements_np, 0] != 0)
+            and float(np.abs(coords_np).max()) < 1e4
+        ):
+            header = f"{elements_np.size}\n{comment}\n".encode()
+            out = np.empty(elements_np.size * 42, dtype=np.uint8)
+            n_bytes = _fill_xyz(elements_np, coords_np, out, _SYM_CODES)
+            return (header + out[:n_bytes].tobytes()).decode().rstrip("\n")
+
+        syms = _SYMBOL_LUT[elements_np]
+        rows = np.empty((len(syms), 4), dtype=object)
+        rows[:, 0] = syms
+        rows[:, 1:] = coords_np
+
+        buf = io.StringIO()
+        buf.write(f"{elements_np.size}\n{comment}\n")
+        np.savetxt(buf, rows, fmt=["%-2s", "%12.6f", "%12.6f", "%12.6f"])
+        return buf.getvalue().rstrip("\n")
 
 
 # Global optimizer instance
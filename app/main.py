@@ -6,6 +6,7 @@ from contextlib import asynccontextmanager
 import torch
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from prometheus_client import make_asgi_app
 
 from app.api import routes
@@ -34,6 +35,7 @@ async def lifespan(app: FastAPI):
     if torch.cuda.is_available():
         device_name = torch.cuda.get_device_name(0)
         logger.info(f"GPU available: {device_name}")
+        logger.info(f"Float32 matmul precision: {settings.matmul_precision}")
     else:
         logger.warning("No GPU available, using CPU")
     
@@ -51,6 +53,7 @@ app = FastAPI(
     description="GPU-optimized molecular structure optimization service",
     version=settings.version,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Add CORS middleware
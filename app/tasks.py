@@ -2,11 +2,15 @@
 
 import asyncio
 import logging
-from typing import Any, Dict
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
 
 import numpy as np
+import orjson
+import redis
 from celery import Celery, Task
-from celery.signals import task_failure, task_success
+from celery.signals import task_failure, task_success, worker_process_init
 
 from app.config import settings
 from app.core.model_manager import model_manager
@@ -32,24 +36,205 @@ celery_app.conf.update(
     task_soft_time_limit=settings.celery_task_soft_time_limit,
     task_track_started=True,
     task_acks_late=True,
-    worker_prefetch_multiplier=1,
+    worker_prefetch_multiplier=settings.celery_worker_prefetch_multiplier,
+    # Route GPU-bound TorchANI tasks and CPU-bound RDKit conversion to
+    # separate queues so slow optimizations don't block fast conversions.
+    # Start workers as:
+    #   celery -A app.tasks worker -Q gpu_opt -c 1 -Ofair
+    #   celery -A app.tasks worker -Q cpu_smiles
+    task_routes={
+        "optimize_structure": {"queue": "gpu_opt"},
+        "optimize_coords": {"queue": "gpu_opt"},
+        "batch_optimize": {"queue": "gpu_opt"},
+        "smiles_to_coords": {"queue": "cpu_smiles"},
+        # Maintenance and errbacks run on the CPU queue; nothing consumes
+        # the default queue since workers start with explicit -Q lists
+        "cleanup_old_jobs": {"queue": "cpu_smiles"},
+        "record_job_failure": {"queue": "cpu_smiles"},
+    },
+)
+
+
+# Shared connection pool for the result backend, so periodic and manual
+# maintenance tasks don't open a fresh TCP connection per invocation
+_result_redis_pool = redis.ConnectionPool.from_url(
+    settings.celery_result_backend, max_connections=16
 )
 
 
+def _to_json_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert array fields to lists at the Celery JSON boundary.
+
+    The optimizer returns coordinates/forces as NumPy arrays; Celery's
+    JSON serializer needs plain lists, so the conversion happens once
+    here instead of inside the optimizer.
+    """
+    for key in ("coordinates", "forces"):
+        value = result.get(key)
+        if isinstance(value, np.ndarray):
+            result[key] = value.tolist()
+    return result
+
+
+# One long-lived event loop per worker process, driven by a daemon
+# thread. Tasks submit coroutines into it instead of spinning their own
+# loop, so background work (model prefetch, Redis pipelining, the
+# producer/consumer batch pipeline) keeps running between calls.
+# Created lazily rather than at import: the prefork pool imports this
+# module in the worker parent and then forks, and threads don't survive
+# fork — a loop thread started at import would be dead in every child.
+_worker_loop: asyncio.AbstractEventLoop = None
+_worker_loop_lock = threading.Lock()
+
+
+def _get_worker_loop() -> asyncio.AbstractEventLoop:
+    """Get (starting on first use) this process's background event loop."""
+    global _worker_loop
+    with _worker_loop_lock:
+        if _worker_loop is None:
+            _worker_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_worker_loop.run_forever,
+                name="celery-async-loop",
+                daemon=True,
+            ).start()
+    return _worker_loop
+
+
 class AsyncTask(Task):
     """Base task class for async execution."""
-    
-    def __init__(self):
-        super().__init__()
-        self.loop = None
-    
+
     def run_async(self, coro):
-        """Run async coroutine in sync context."""
-        if self.loop is None:
-            self.loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(self.loop)
-        
-        return self.loop.run_until_complete(coro)
+        """Run async coroutine on the persistent worker loop."""
+        return asyncio.run_coroutine_threadsafe(coro, _get_worker_loop()).result()
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Initialize the model manager once per worker process.
+
+    Running this at fork time keeps the redis/model setup off the task
+    hot path, so tasks no longer need a lazy-initialization check.
+    """
+    try:
+        asyncio.run_coroutine_threadsafe(
+            model_manager.initialize(), _get_worker_loop()
+        ).result()
+        logger.info("Model manager initialized for worker process")
+    except Exception as e:
+        logger.error(f"Worker model manager initialization failed: {e}")
+
+
+@celery_app.task(
+    name="smiles_to_coords",
+    max_retries=3,
+)
+def smiles_to_coords_task(smiles: str) -> Dict[str, Any]:
+    """
+    CPU-side SMILES to 3D conversion, kept off the GPU queue.
+
+    Args:
+        smiles: SMILES string of molecule
+
+    Returns:
+        Structure dict with coordinates and atomic numbers
+    """
+    coordinates, elements = optimizer.smiles_to_structure(smiles)
+
+    return {
+        "smiles": smiles,
+        "coordinates": np.asarray(coordinates).tolist(),
+        "elements": np.asarray(elements).tolist(),
+    }
+
+
+@celery_app.task(
+    name="record_job_failure",
+    ignore_result=True,
+)
+def record_job_failure_task(request, exc, traceback, job_id: str = "") -> None:
+    """
+    Errback recording a chain failure under the job's id.
+
+    When an upstream task in a submit_job chain fails (e.g. an invalid
+    SMILES in smiles_to_coords), the final task carrying the job's
+    task_id never runs, so no result meta is written for the job id and
+    status polling would report the job pending forever. Writing a
+    FAILURE result here lets /jobs/{job_id} surface the error.
+    """
+    logger.error(f"Job {job_id} failed before completion: {exc}")
+    celery_app.backend.store_result(job_id, Exception(str(exc)), "FAILURE")
+
+
+@celery_app.task(
+    bind=True,
+    base=AsyncTask,
+    name="optimize_coords",
+    max_retries=3,
+)
+def optimize_coords_task(
+    self,
+    structure: Dict[str, Any],
+    job_id: str,
+    model_name: str = None,
+    max_steps: int = 1000,
+    fmax: float = 1e-6,
+    optimizer_name: str = "LBFGS",
+) -> Dict[str, Any]:
+    """
+    GPU-side optimization of a pre-converted structure.
+
+    Designed to be chained after smiles_to_coords so GPU workers never
+    run RDKit embedding.
+
+    Args:
+        structure: Structure dict from smiles_to_coords
+        job_id: Unique job identifier
+        model_name: TorchANI model to use
+        max_steps: Maximum optimization steps
+        fmax: Force convergence criterion
+        optimizer_name: Optimization algorithm
+
+    Returns:
+        Optimization results
+    """
+    try:
+        smiles = structure.get("smiles", "")
+        logger.info(f"Starting optimization job {job_id} for SMILES: {smiles}")
+
+        coordinates = np.asarray(structure["coordinates"])
+        elements = structure["elements"]
+
+        self.update_state(
+            state="PROGRESS",
+            meta={"progress": 50.0, "status": "Running optimization"},
+        )
+
+        result = self.run_async(
+            optimizer.optimize_structure(
+                coordinates=coordinates,
+                elements=elements,
+                model_name=model_name,
+                max_steps=max_steps,
+                fmax=fmax,
+                optimizer=optimizer_name,
+            )
+        )
+
+        result["job_id"] = job_id
+        result["smiles"] = smiles
+        result["xyz"] = optimizer.structure_to_xyz(
+            result["coordinates"],
+            result["elements"],
+            comment=f"Optimized structure for {smiles}",
+        )
+
+        logger.info(f"Optimization job {job_id} completed successfully")
+        return _to_json_result(result)
+
+    except Exception as e:
+        logger.error(f"Optimization job {job_id} failed: {e}")
+        raise self.retry(exc=e, countdown=2 ** self.request.retries)
 
 
 @celery_app.task(
@@ -99,10 +284,6 @@ def optimize_structure_task(
             meta={"progress": 30.0, "status": "Loading model"},
         )
         
-        # Initialize model manager if needed
-        if model_manager.redis_client is None:
-            self.run_async(model_manager.initialize())
-        
         # Update progress
         self.update_state(
             state="PROGRESS",
@@ -133,13 +314,13 @@ def optimize_structure_task(
         
         # Convert to XYZ format
         result["xyz"] = optimizer.structure_to_xyz(
-            np.array(result["coordinates"]),
+            result["coordinates"],
             result["elements"],
             comment=f"Optimized structure for {smiles}",
         )
-        
+
         logger.info(f"Optimization job {job_id} completed successfully")
-        return result
+        return _to_json_result(result)
         
     except Exception as e:
         logger.error(f"Optimization job {job_id} failed: {e}")
@@ -175,51 +356,70 @@ def batch_optimize_task(
     """
     try:
         logger.info(f"Starting batch optimization job {job_id} for {len(smiles_list)} molecules")
-        
-        results = []
+
         total = len(smiles_list)
-        
-        # Initialize model manager if needed
-        if model_manager.redis_client is None:
-            self.run_async(model_manager.initialize())
-        
-        for i, smiles in enumerate(smiles_list):
-            # Update progress
-            progress = (i / total) * 100
-            self.update_state(
-                state="PROGRESS",
-                meta={
-                    "progress": progress,
-                    "status": f"Optimizing molecule {i+1}/{total}",
-                    "current_smiles": smiles,
-                },
-            )
-            
-            try:
-                # Convert SMILES to structure
-                coordinates, elements = optimizer.smiles_to_structure(smiles)
-                
-                # Run optimization
-                result = self.run_async(
-                    optimizer.optimize_structure(
-                        coordinates=coordinates,
-                        elements=elements,
+
+        # Pipeline: a producer converts SMILES chunks in an executor
+        # thread while the consumer relaxes the previous chunk on the
+        # GPU, so RDKit embedding overlaps optimization instead of
+        # running entirely up front.
+        results = [None] * total
+
+        async def _pipeline():
+            queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+            chunk = settings.max_batch_size
+
+            async def producer():
+                for start in range(0, total, chunk):
+                    indices = list(range(start, min(start + chunk, total)))
+                    structures = {}
+                    errors = {}
+                    for i in indices:
+                        try:
+                            structures[i] = await optimizer.smiles_to_structure_cached(
+                                smiles_list[i]
+                            )
+                        except Exception as e:
+                            logger.error(f"Failed to convert {smiles_list[i]}: {e}")
+                            errors[i] = str(e)
+                    await queue.put((structures, errors))
+                await queue.put(None)
+
+            producer_task = asyncio.create_task(producer())
+            done = 0
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                structures, errors = item
+                valid_indices = sorted(structures)
+                if valid_indices:
+                    optimize_results = await optimizer.batch_optimize(
+                        [structures[i] for i in valid_indices],
                         model_name=model_name,
                         **kwargs,
                     )
+                    for i, result in zip(valid_indices, optimize_results):
+                        result["smiles"] = smiles_list[i]
+                        results[i] = _to_json_result(result)
+                for i, error in errors.items():
+                    results[i] = {
+                        "smiles": smiles_list[i],
+                        "success": False,
+                        "error": error,
+                    }
+                done += len(valid_indices) + len(errors)
+                self.update_state(
+                    state="PROGRESS",
+                    meta={
+                        "progress": 10.0 + 80.0 * done / total,
+                        "status": f"Optimized {done}/{total} molecules",
+                    },
                 )
-                
-                result["smiles"] = smiles
-                results.append(result)
-                
-            except Exception as e:
-                logger.error(f"Failed to optimize {smiles}: {e}")
-                results.append({
-                    "smiles": smiles,
-                    "success": False,
-                    "error": str(e),
-                })
-        
+            await producer_task
+
+        self.run_async(_pipeline())
+
         logger.info(f"Batch optimization job {job_id} completed")
         
         return {
@@ -235,6 +435,32 @@ def batch_optimize_task(
         raise self.retry(exc=e, countdown=2 ** self.request.retries)
 
 
+def _unlink_expired(r: redis.Redis, keys: List[bytes], cutoff: datetime) -> int:
+    """Unlink result keys whose date_done is older than the cutoff."""
+    expired = []
+    for key, value in zip(keys, r.mget(keys)):
+        if value is None:
+            continue
+        try:
+            date_done = orjson.loads(value).get("date_done")
+        except orjson.JSONDecodeError:
+            continue
+        if not date_done:
+            continue
+        done = datetime.fromisoformat(date_done)
+        if done.tzinfo is None:
+            done = done.replace(tzinfo=timezone.utc)
+        if done < cutoff:
+            expired.append(key)
+
+    if expired:
+        pipe = r.pipeline(transaction=False)
+        for key in expired:
+            pipe.unlink(key)
+        pipe.execute()
+    return len(expired)
+
+
 @celery_app.task(
     name="cleanup_old_jobs",
     ignore_result=True,
@@ -242,22 +468,30 @@ def batch_optimize_task(
 def cleanup_old_jobs():
     """
     Periodic task to cleanup old job results.
-    
+
     This should be scheduled to run periodically (e.g., daily)
-    to clean up old results from Redis.
+    to clean up old results from Redis. Keys are walked with SCAN in
+    batches and removed with pipelined non-blocking UNLINKs, so the
+    sweep never stalls the result backend.
     """
     try:
         logger.info("Starting cleanup of old job results")
-        
-        # Get Redis client
-        import redis
-        r = redis.from_url(settings.celery_result_backend)
-        
-        # Find and delete old results (older than 7 days)
-        # This is a simplified example - implement based on your needs
-        
-        logger.info("Cleanup completed")
-        
+
+        r = redis.Redis(connection_pool=_result_redis_pool)
+        cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+
+        removed = 0
+        batch: List[bytes] = []
+        for key in r.scan_iter(match="celery-task-meta-*", count=1000):
+            batch.append(key)
+            if len(batch) >= 1000:
+                removed += _unlink_expired(r, batch, cutoff)
+                batch = []
+        if batch:
+            removed += _unlink_expired(r, batch, cutoff)
+
+        logger.info(f"Cleanup completed, removed {removed} job results")
+
     except Exception as e:
         logger.error(f"Cleanup failed: {e}")
 